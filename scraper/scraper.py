@@ -1,13 +1,31 @@
 import os
 import csv
+import io
+import json
+import argparse
 import random
 import time
 import logging
 import re
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+import httpx
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from utils import setup_logger, random_delay, random_user_agent, get_timestamp, handle_errors, validate_and_clean_data
+from selectolax.parser import HTMLParser
+from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeoutError
+
+# Optional: curl_cffi impersonates a real browser's TLS fingerprint on the fast path
+try:
+    from curl_cffi.requests import AsyncSession as CurlSession, RequestsError as CurlError
+except ImportError:
+    CurlSession = CurlError = None
+
+from utils import Record, setup_logger, random_delay, random_user_agent, get_timestamp, handle_errors, validate_and_clean_data, read_cache, write_cache, backoff_delay, rate_limit_pause, record_key
 
 # Load environment variables
 load_dotenv()
@@ -15,42 +33,202 @@ load_dotenv()
 # Configuration from environment variables
 CITIES_FILE = os.path.join(os.path.dirname(__file__), "cities.txt")
 MAX_PAGES_PER_CITY = int(os.getenv("MAX_PAGES_PER_CITY", 5))
-REQUEST_DELAY_MIN = float(os.getenv("REQUEST_DELAY_MIN", 2))
-REQUEST_DELAY_MAX = float(os.getenv("REQUEST_DELAY_MAX", 5))
-MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
+REQUEST_DELAY_MIN = float(os.getenv("REQUEST_DELAY_MIN", 0.2))  # Anti-bot jitter only, pages are awaited by event
+REQUEST_DELAY_MAX = float(os.getenv("REQUEST_DELAY_MAX", 0.5))
+MAX_RETRIES = max(1, int(os.getenv("MAX_RETRIES", 3)))
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")  # Custom output directory
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, os.getenv("OUTPUT_FILE", "pediatricians_data.csv"))
 TIMESTAMP_FORMAT = os.getenv("TIMESTAMP_FORMAT", "%Y-%m-%d_%H-%M-%S")
 USER_AGENT_ROTATION = os.getenv("USER_AGENT_ROTATION", "true").lower() == "true"
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
+BROWSER_ENDPOINT = os.getenv("BROWSER_ENDPOINT")  # CDP endpoint of an already running Chromium
 STOP_ON_EMPTY_PAGE = os.getenv("STOP_ON_EMPTY_PAGE", "true").lower() == "true"
 CONTINUE_ON_ERROR = os.getenv("CONTINUE_ON_ERROR", "true").lower() == "true"
-BATCH_SAVE_SIZE = int(os.getenv("BATCH_SAVE_SIZE", 50))
 EXTRACT_PHONE = os.getenv("EXTRACT_PHONE", "true").lower() == "true"
+SAVE_SCREENSHOTS = os.getenv("SAVE_SCREENSHOTS", "false").lower() == "true"  # Screenshot the page on errors
+SCREENSHOT_FULL_PAGE = os.getenv("SCREENSHOT_FULL_PAGE", "false").lower() == "true"  # Whole page instead of viewport
+REVEAL_PHONE = os.getenv("REVEAL_PHONE", "false").lower() == "true"  # Click "Contact Clinic" for hidden numbers (browser only)
+MAX_CONCURRENCY = max(1, int(os.getenv("MAX_CONCURRENCY", 5)))  # Cities scraped in parallel
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 1)) or os.cpu_count() or 1  # 0 = one per CPU
+HTTP_FAST_PATH = os.getenv("HTTP_FAST_PATH", "true").lower() == "true"  # Try plain HTTP before the browser
+HTTP_CONCURRENCY = max(1, int(os.getenv("HTTP_CONCURRENCY", 20)))  # Concurrent HTTP requests
+HTTP_IMPERSONATE = os.getenv("HTTP_IMPERSONATE", "")  # Browser for curl_cffi to impersonate, e.g. chrome124
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"  # Reuse listing pages across runs
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(".cache", "practo"))
+HTTP_CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", 86400))  # Seconds before a cached page is refetched
+
+BASE_URL = "https://www.practo.com"
 
 # Headers for CSV output
 HEADERS = ["City", "Clinic", "Location", "Fee", "Experience", "Phone", "Timestamp"]
+CSV_BUFFER_SIZE = 1 << 20  # 1 MiB; a whole city batch goes out in one write when flushed
 
 # Improved selectors with fallbacks
 SELECTORS = {
     'cards': ['.reach-v2-card', '.doctor-card', '[data-qa-id="doctor_card"]'],
     'name': ['h2.u-color--primary', 'h2[data-qa-id="doctor_name"]', '.doctor-name', 'h2', 'h3'],
     'location': ['span.u-bold', '.location', '[data-qa-id="clinic_name"]', '.clinic-name'],
-    'fee': ['span.u-bold', '.fee', '[data-qa-id="consultation_fee"]', '.consultation-fee'],
-    'experience': ['span:has-text("years experience")', '.experience', '[data-qa-id="experience"]'],
-    'contact_btn': ['button:has-text("Contact Clinic")', '.contact-btn', '[data-qa-id="contact"]'],
-    'phone': ['.c-vn__number', '.phone-number', '[data-qa-id="phone"]'],
+    'fee': ['[data-qa-id*="fee"]', '[class*="consultation-fee"]', '[class*="fee"]', 'span:has-text("₹")', '.fee', 'span.u-bold'],
+    'experience': ['[data-qa-id="experience"]', 'span:has-text("year experience")', 'span:has-text("years experience")',
+                   'span:has-text("year")', 'span:has-text("years")', '[class*="experience"]'],
+    'contact_btn': ['button:has-text("Contact Clinic")', 'button:has-text("Call")', 'a:has-text("Contact")',
+                    '.contact-btn', '[data-qa-id="contact"]'],
+    'phone': ['[data-qa-id="phone_number"]', '.c-vn__number', '.phone-number', '[data-qa-id="phone"]'],
     'next_btn': ['a.paginator__next', '.next-page', '[data-qa-id="next_page"]']
 }
 
+# Lowercase substrings of texts that look like a price or fee but are not the consultation fee
+FEE_EXCLUDES = ('available today', 'on - call', 'call now', 'book appointment', 'consult online',
+                'video consult', 'chat', 'book now', 'contact', 'patient stories', 'experience', 'years')
+
+# Shared helpers for the in-page scripts below. Selectors come from SELECTORS;
+# Playwright-only `tag:has-text("...")` entries are emulated with a text match.
+CARD_QUERY_JS = r"""
+    const hasText = /^([\w.-]+):has-text\("(.*)"\)$/;
+    const queryAll = (root, selector) => {
+        const m = selector.match(hasText);
+        if (!m) return Array.from(root.querySelectorAll(selector));
+        const needle = m[2].toLowerCase();
+        return Array.from(root.querySelectorAll(m[1]))
+            .filter(el => el.textContent.toLowerCase().includes(needle));
+    };
+    const text = (el) => (el && el.innerText ? el.innerText.trim() : '');
+    const first = (root, selectors) => {
+        for (const s of selectors) {
+            const t = text(queryAll(root, s)[0]);
+            if (t) return t;
+        }
+        return '';
+    };
+    const findCards = () => {
+        for (const s of sel.cards) {
+            const cards = queryAll(document, s);
+            if (cards.length) return cards;
+        }
+        return [];
+    };
+"""
+
+# Reads every card on the page in a single browser round-trip
+EXTRACT_CARDS_JS = "(sel) => {" + CARD_QUERY_JS + f"""
+    const feeExcludes = {json.dumps(FEE_EXCLUDES)};""" + r"""
+    // Last-resort fee and experience: first span/div that looks like one, scanned in-page
+    // so only the matched strings cross back instead of every descendant's text
+    const yearsExp = /(\d+)\s*(?:years?|yrs?)\s*(?:experience|exp)/;
+    const isFallbackFee = (t) => {
+        const l = t.toLowerCase();
+        return ((t.includes('₹') && t.length <= 20) ||
+                ((l.includes('fee') || l.includes('consultation')) && /\d/.test(t))) &&
+               !feeExcludes.some(x => l.includes(x));
+    };
+    const scanFallbacks = (card, wantFee) => {
+        let feeFallback = '', experienceFallback = '';
+        for (const el of card.querySelectorAll('span, div')) {
+            const t = text(el);
+            if (wantFee && !feeFallback && isFallbackFee(t)) feeFallback = t;
+            if (!experienceFallback) {
+                const m = yearsExp.exec(t.toLowerCase());
+                if (m) experienceFallback = m[1];
+            }
+            if ((feeFallback || !wantFee) && experienceFallback) break;
+        }
+        return {feeFallback, experienceFallback};
+    };
+
+    return findCards().map(card => {
+        const feeEl = card.querySelector('[data-qa-id="consultation_fee"]');
+        return {
+            name: first(card, sel.name),
+            clinic: text(card.querySelector('[data-qa-id="doctor_clinic_name"]')),
+            locality: text(card.querySelector('[data-qa-id="practice_locality"]')),
+            city: text(card.querySelector('[data-qa-id="practice_city"]')),
+            fee: feeEl ? text(feeEl) : null,
+            feeCandidates: feeEl ? [] : sel.fee.flatMap(s => queryAll(card, s).map(text)),
+            experience: sel.experience.map(s => text(queryAll(card, s)[0])),
+            ...scanFallbacks(card, !feeEl),
+            phone: first(card, sel.phone),
+        };
+    });
+}
+"""
+
+# A revealed number shows up in a shared contact modal, outside every card
+PHONE_OVERLAY_JS = r"""
+    const overlayPhone = (cards) => {
+        for (const s of sel.phone) {
+            for (const el of queryAll(document, s)) {
+                const t = text(el);
+                if (t && !cards.some(card => card.contains(el))) return t;
+            }
+        }
+        return '';
+    };
+"""
+
+# Clicks the contact button of one card, returning whether there was one to click
+CLICK_CONTACT_JS = "([sel, index]) => {" + CARD_QUERY_JS + r"""
+    const card = findCards()[index];
+    if (!card) return false;
+    for (const s of sel.contact_btn) {
+        const btn = queryAll(card, s)[0];
+        if (btn) { btn.click(); return true; }
+    }
+    return false;
+}
+"""
+
+# Resolves to the number revealed for one card, in the card itself or in the modal
+REVEALED_PHONE_JS = "([sel, index]) => {" + CARD_QUERY_JS + PHONE_OVERLAY_JS + r"""
+    const cards = findCards();
+    return (cards[index] && first(cards[index], sel.phone)) || overlayPhone(cards);
+}
+"""
+
+# Resolves once the contact modal no longer shows a number
+OVERLAY_CLOSED_JS = "(sel) => {" + CARD_QUERY_JS + PHONE_OVERLAY_JS + r"""
+    return !overlayPhone(findCards());
+}
+"""
+
+# Matches Playwright-only `tag:has-text("...")` selectors so they can be emulated outside the browser
+HAS_TEXT_SELECTOR_RE = re.compile(r'^([\w.-]+):has-text\("(.*)"\)$')
+
+# Years-of-experience patterns, compiled once since they run against every card
+YEARS_RE = re.compile(r'(\d+)\s*(?:years?|yrs?)')
+YEARS_EXP_RE = re.compile(r'(\d+)\s*(?:years?|yrs?)\s*(?:experience|exp)')
+HAS_DIGIT_RE = re.compile(r'\d')
+
+# Static assets and third-party hosts the scraper never needs. They are blocked inside
+# Chromium via CDP so those requests never reach a Python route handler.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "stylesheet", "font", "media"})
+BLOCKED_EXTENSIONS = ("jpg", "jpeg", "png", "gif", "webp", "svg", "ico", "css", "woff", "woff2", "ttf", "mp4", "webm")
+BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+                 "facebook.net", "connect.facebook.com", "hotjar.com", "clarity.ms", "newrelic.com", "nr-data.net",
+                 "branch.io", "moengage.com", "sentry.io")
+BLOCKED_URL_PATTERNS = [f"*.{ext}" for ext in BLOCKED_EXTENSIONS] + [f"*.{ext}?*" for ext in BLOCKED_EXTENSIONS] \
+    + [f"*{host}/*" for host in BLOCKED_HOSTS]
+
+# Errors raised by whichever HTTP client the fast path uses
+HTTP_ERRORS = (httpx.HTTPError, CurlError) if CurlError else (httpx.HTTPError,)
+HTTP_TRANSPORT_ERRORS = (httpx.TransportError, CurlError) if CurlError else (httpx.TransportError,)
+
+# Status codes that mean the listing is gated behind a browser check
+BLOCKED_STATUSES = {401, 403, 503}
+# Status codes worth retrying after a backoff (rate limiting and transient upstream errors)
+RETRY_STATUSES = {429, 500, 502, 504}
+
 # Setup logger
 logger = setup_logger()
 
+# Monotonic time until which fast-path requests hold off, set from X-RateLimit-* headers
+rate_limit_until = 0.0
+
 def load_cities():
     """Load cities from text file"""
     try:
-        with open(CITIES_FILE, "r") as f:
-            cities = [line.strip().lower() for line in f if line.strip()]
+        # Read once, normalize, and dedupe; sorted so runs are deterministic
+        raw = Path(CITIES_FILE).read_text(encoding="utf-8").lower()
+        cities = sorted({city for city in map(str.strip, raw.splitlines()) if city})
         logger.info(f"Loaded {len(cities)} cities from {CITIES_FILE}")
         return cities
     except FileNotFoundError:
@@ -60,25 +238,35 @@ def load_cities():
         logger.error(f"Error loading cities: {str(e)}")
         return []
 
-def init_browser(playwright):
-    """Initialize browser with anti-blocking settings"""
+def get_proxy_config():
+    """Read proxy settings from the environment, if enabled"""
+    if os.getenv("PROXY_ENABLED", "false").lower() != "true":
+        return None
+    
+    proxy_server = os.getenv("PROXY_SERVER")
+    if not proxy_server:
+        return None
+    
+    return {
+        "server": proxy_server,
+        "username": os.getenv("PROXY_USER"),
+        "password": os.getenv("PROXY_PASSWORD")
+    }
+
+async def init_browser(playwright, endpoint=None):
+    """Initialize browser with anti-blocking settings, or attach to a warm one over CDP"""
+    if endpoint:
+        # Reuse a long-running Chromium (see scripts/start_browser.sh) instead of cold-starting one
+        logger.info(f"Connecting to browser at {endpoint}")
+        return await playwright.chromium.connect_over_cdp(endpoint)
+    
     # Proxy configuration (if enabled)
-    proxy_config = None
-    if os.getenv("PROXY_ENABLED", "false").lower() == "true":
-        proxy_server = os.getenv("PROXY_SERVER")
-        proxy_user = os.getenv("PROXY_USER")
-        proxy_password = os.getenv("PROXY_PASSWORD")
-        
-        if proxy_server:
-            proxy_config = {
-                "server": proxy_server,
-                "username": proxy_user,
-                "password": proxy_password
-            }
-            logger.info(f"Using proxy: {proxy_server}")
+    proxy_config = get_proxy_config()
+    if proxy_config:
+        logger.info(f"Using proxy for browser: {proxy_config['server']}")
 
     # Launch browser
-    browser = playwright.chromium.launch(
+    browser = await playwright.chromium.launch(
         headless=HEADLESS,
         proxy=proxy_config,
         args=[
@@ -89,75 +277,78 @@ def init_browser(playwright):
             "--disable-dev-shm-usage",
             "--disable-background-timer-throttling",
             "--disable-backgrounding-occluded-windows",
-            "--disable-renderer-backgrounding"
+            "--disable-renderer-backgrounding",
+            "--blink-settings=imagesEnabled=false"
         ]
     )
     
-    context = browser.new_context(
+    return browser
+
+CACHE_HIT_HEADER = "x-scraper-cache"
+
+async def configure_context(context):
+    """Serve Practo listing documents from the disk cache, if enabled"""
+    if not HTTP_CACHE_ENABLED:
+        return
+    
+    async def route_handler(route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            # Extensionless assets that slipped past the CDP URL patterns
+            await route.abort()
+        elif request.resource_type == "document" and request.method == "GET":
+            cached = read_cache(HTTP_CACHE_DIR, request.url, HTTP_CACHE_TTL)
+            if cached is not None:
+                logger.debug("Cache hit: %s", request.url)
+                await route.fulfill(status=200, body=cached, content_type="text/html; charset=utf-8",
+                                    headers={CACHE_HIT_HEADER: "1"})
+                return
+            # Misses go to the network; load_listing_page caches them once cards show up
+            await route.continue_()
+        else:
+            await route.continue_()
+    
+    # Only Practo's own URLs pass through Python; everything else stays in the browser
+    await context.route(f"{BASE_URL}/**", route_handler)
+
+async def new_scraping_page(context):
+    """Open a page with static assets and trackers blocked at Chromium's network layer"""
+    page = await context.new_page()
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Network.enable")
+    await cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return page
+
+async def new_scraping_context(browser):
+    """Create an isolated browser context with anti-blocking settings"""
+    context = await browser.new_context(
         user_agent=random_user_agent() if USER_AGENT_ROTATION else None,
         viewport={"width": 1366, "height": 768},
         java_script_enabled=True,
         ignore_https_errors=True
     )
-    
-    # Block unnecessary resources
-    def route_handler(route):
-        if any(ext in route.request.url for ext in [".jpg", ".png", ".gif", ".css", ".woff2", ".svg", ".ico"]):
-            route.abort()
-        else:
-            route.continue_()
-    
-    context.route("**/*", route_handler)
-    
-    return browser, context
+    await configure_context(context)
+    return context
 
-def find_element_with_selectors(element, selectors, method='query_selector'):
-    """Try multiple selectors to find an element"""
-    for selector in selectors:
-        try:
-            if method == 'query_selector':
-                result = element.query_selector(selector)
-                if result:
-                    return result
-            elif method == 'query_selector_all':
-                result = element.query_selector_all(selector)
-                if result:
-                    return result
-        except Exception as e:
-            logger.debug(f"Selector '{selector}' failed: {str(e)}")
-            continue
-    return None
-
-def extract_doctor_data(card, city):
-    """Extract data from a single doctor card with improved error handling"""
+def extract_doctor_data(raw: dict, city: str, timestamp: Optional[str] = None) -> Optional[Record]:
+    """Build a cleaned record from the raw card fields returned by EXTRACT_CARDS_JS"""
     try:
         # Extract name
-        name_element = find_element_with_selectors(card, SELECTORS['name'])
-        if not name_element:
+        name = (raw.get('name') or "").strip()
+        if not name:
             logger.warning("Could not find doctor name")
             return None
-        name = name_element.inner_text().strip()
         
         # Extract location - use specific data-qa-id attributes
         location = "N/A"
         
-        # Extract the three components
-        clinic_name_element = card.query_selector('[data-qa-id="doctor_clinic_name"]')
-        practice_locality_element = card.query_selector('[data-qa-id="practice_locality"]')
-        practice_city_element = card.query_selector('[data-qa-id="practice_city"]')
-        
-        # Get text from each element
-        clinic_name = clinic_name_element.inner_text().strip() if clinic_name_element else ""
-        practice_locality = practice_locality_element.inner_text().strip() if practice_locality_element else ""
-        practice_city = practice_city_element.inner_text().strip() if practice_city_element else ""
-        
         # Clean any trailing commas from individual components
-        clinic_name = clinic_name.rstrip(',').strip()
-        practice_locality = practice_locality.rstrip(',').strip()  
-        practice_city = practice_city.rstrip(',').strip()
+        clinic_name = (raw.get('clinic') or "").strip().strip(',').strip()
+        practice_locality = (raw.get('locality') or "").strip().strip(',').strip()
+        practice_city = (raw.get('city') or "").strip().strip(',').strip()
         
         # Debug logging
-        logger.debug(f"Clinic: '{clinic_name}', Locality: '{practice_locality}', City: '{practice_city}'")
+        logger.debug("Clinic: '%s', Locality: '%s', City: '%s'", clinic_name, practice_locality, practice_city)
         
         # Format as: ${doctor_clinic_name}, ${practice_locality}, ${practice_city}
         location_parts = []
@@ -170,159 +361,66 @@ def extract_doctor_data(card, city):
         
         if location_parts:
             location = ", ".join(location_parts)
-            logger.debug(f"Found location: {location}")
+            logger.debug("Found location: %s", location)
         else:
             logger.debug("No location data found in data-qa-id attributes")
         
         # Extract fee - improved logic for consultation fee
-        fee = "N/A"
+        fee_text = "N/A"
         
         # Primary: Try specific consultation fee selector first
-        fee_element = card.query_selector('[data-qa-id="consultation_fee"]')
-        if fee_element:
-            fee_text = fee_element.inner_text().strip()
-            logger.debug(f"Found consultation fee element: {fee_text}")
+        if raw.get('fee') is not None:
+            fee_text = raw['fee']
+            logger.debug("Found consultation fee element: %s", fee_text)
         else:
             # Secondary: Look for fee-related patterns in specific containers
-            fee_selectors = [
-                '[data-qa-id*="fee"]',
-                '[class*="consultation-fee"]',
-                '[class*="fee"]',
-                'span:has-text("₹")',
-                '.fee',
-                'span.u-bold'
-            ]
-            
-            fee_text = "N/A"
-            for selector in fee_selectors:
-                try:
-                    elements = card.query_selector_all(selector)
-                    for element in elements:
-                        text = element.inner_text().strip()
-                        # Check if this looks like a consultation fee
-                        if ('₹' in text or 
-                            (text.isdigit() and len(text) >= 2 and len(text) <= 5) or
-                            'consultation' in text.lower() or
-                            'fee' in text.lower()):
-                            # Avoid non-fee values
-                            if not any(exclude in text.lower() for exclude in [
-                                'available today', 'on - call', 'call now', 'book appointment',
-                                'consult online', 'video consult', 'chat', 'book now', 'contact',
-                                'patient stories', 'experience', 'years'
-                            ]):
-                                fee_text = text
-                                logger.debug(f"Found fee with selector {selector}: {fee_text}")
-                                break
-                    if fee_text != "N/A":
+            for text in raw.get('feeCandidates', []):
+                lowered = text.lower()
+                # Check if this looks like a consultation fee
+                if ('₹' in text or 
+                    (text.isdigit() and len(text) >= 2 and len(text) <= 5) or
+                    'consultation' in lowered or
+                    'fee' in lowered):
+                    # Avoid non-fee values
+                    if not any(exclude in lowered for exclude in FEE_EXCLUDES):
+                        fee_text = text
+                        logger.debug("Found fee candidate: %s", fee_text)
                         break
-                except Exception as e:
-                    logger.debug(f"Fee selector {selector} failed: {str(e)}")
-                    continue
         
-        # Tertiary: Look specifically for currency patterns if no structured fee found
-        if fee_text == "N/A":
-            try:
-                # Look for any element containing currency or fee-like patterns
-                all_elements = card.query_selector_all('span, div')
-                for element in all_elements:
-                    text = element.inner_text().strip()
-                    # Look for currency patterns or fee indicators
-                    if (('₹' in text and len(text) <= 20) or 
-                        ('fee' in text.lower() and any(char.isdigit() for char in text)) or
-                        ('consultation' in text.lower() and any(char.isdigit() for char in text))):
-                        # Avoid common non-fee texts
-                        if not any(exclude in text.lower() for exclude in [
-                            'patient stories', 'experience overall', 'available today',
-                            'on - call', 'book appointment', 'video consult'
-                        ]):
-                            fee_text = text
-                            logger.debug(f"Found fee with currency pattern: {fee_text}")
-                            break
-            except Exception as e:
-                logger.debug(f"Fee currency search failed: {str(e)}")
+        # Tertiary: currency pattern found by the in-page scan if no structured fee found
+        if fee_text == "N/A" and raw.get('feeFallback'):
+            fee_text = raw['feeFallback']
+            logger.debug("Found fee with currency pattern: %s", fee_text)
         
-        fee = fee_text if 'fee_text' in locals() and fee_text != "N/A" else "N/A"
+        fee = fee_text
         
-        # Extract experience with better error handling
+        # Extract experience, trying each selector's first match in order
         experience = "N/A"
-        try:
-            # Try multiple approaches for experience
-            exp_selectors = [
-                '[data-qa-id="experience"]',
-                'span:has-text("year experience")',
-                'span:has-text("years experience")', 
-                'span:has-text("year")',
-                'span:has-text("years")',
-                '[class*="experience"]'
-            ]
-            
-            for selector in exp_selectors:
-                try:
-                    exp_element = card.query_selector(selector)
-                    if exp_element:
-                        exp_text = exp_element.inner_text().strip()
-                        # Extract actual number of years
-                        years_match = re.search(r'(\d+)\s*(?:years?|yrs?)', exp_text.lower())
-                        if years_match:
-                            years = years_match.group(1)
-                            experience = f"{years} years"
-                            logger.debug(f"Found experience with selector {selector}: {experience}")
-                            break
-                        elif exp_text and 'years experience overall' not in exp_text.lower():
-                            experience = exp_text
-                            logger.debug(f"Found experience text with selector {selector}: {experience}")
-                            break
-                except Exception as e:
-                    logger.debug(f"Experience selector {selector} failed: {str(e)}")
-                    continue
-            
-            # If no structured experience found, try general search
-            if experience == "N/A":
-                try:
-                    all_text_elements = card.query_selector_all('span, div')
-                    for element in all_text_elements:
-                        text = element.inner_text().strip()
-                        # Look for experience patterns
-                        years_match = re.search(r'(\d+)\s*(?:years?|yrs?)\s*(?:experience|exp)', text.lower())
-                        if years_match:
-                            years = years_match.group(1)
-                            experience = f"{years} years"
-                            logger.debug(f"Found experience in general search: {experience}")
-                            break
-                except:
-                    pass
-                    
-        except (AttributeError, PlaywrightTimeoutError) as e:
-            logger.debug(f"Experience extraction failed: {str(e)}")
+        for exp_text in raw.get('experience', []):
+            # Extract actual number of years
+            years_match = YEARS_RE.search(exp_text.lower())
+            if years_match:
+                years = years_match.group(1)
+                experience = f"{years} years"
+                logger.debug("Found experience: %s", experience)
+                break
+            elif exp_text and 'years experience overall' not in exp_text.lower():
+                experience = exp_text
+                logger.debug("Found experience text: %s", experience)
+                break
         
-        # Extract phone number - simplified without button clicking
+        # If no structured experience found, use the general search result
+        if experience == "N/A" and raw.get('experienceFallback'):
+            experience = f"{raw['experienceFallback']} years"
+            logger.debug("Found experience in general search: %s", experience)
+        
+        # Extract phone number - only numbers already visible on the card
         phone = "N/A"
         
         if EXTRACT_PHONE:
-            try:
-                # Look for visible phone numbers without clicking buttons
-                phone_selectors = [
-                    '[data-qa-id="phone_number"]',
-                    '.c-vn__number',
-                    '.phone-number',
-                    '[data-qa-id="phone"]'
-                ]
-                
-                for selector in phone_selectors:
-                    try:
-                        phone_element = card.query_selector(selector)
-                        if phone_element:
-                            phone_text = phone_element.inner_text().strip()
-                            if phone_text:
-                                phone = phone_text
-                                logger.debug(f"Found phone: {phone}")
-                                break
-                    except Exception as e:
-                        logger.debug(f"Phone selector {selector} failed: {str(e)}")
-                        continue
-                        
-            except Exception as e:
-                logger.warning(f"Error during phone extraction: {str(e)}")
+            if raw.get('phone'):
+                phone = raw['phone']
+                logger.debug("Found phone: %s", phone)
         else:
             logger.debug("Phone extraction disabled")
         
@@ -333,163 +431,543 @@ def extract_doctor_data(card, city):
             "fee": fee,
             "experience": experience,
             "phone": phone,
-            "timestamp": get_timestamp()
+            "timestamp": timestamp or get_timestamp()
         }
         
         # Validate and clean data
         cleaned_data = validate_and_clean_data(data)
         if not cleaned_data:
-            logger.warning(f"Data validation failed for: {name}")
+            logger.warning("Data validation failed for: %s", name)
             return None
             
         return cleaned_data
         
     except Exception as e:
-        logger.error(f"Error extracting doctor data: {str(e)}")
+        logger.error("Error extracting doctor data: %s", e)
         return None
 
-def scrape_city(page, city, existing_data=None):
-    """Scrape pediatricians for a single city with URL-based pagination"""
-    if existing_data is None:
-        existing_data = set()
+def promote_selector(field: str, selector: str) -> None:
+    """Move a selector that just matched to the front of its SELECTORS list, so later pages try it first"""
+    selectors = SELECTORS[field]
+    if selectors[0] != selector:
+        selectors.remove(selector)
+        selectors.insert(0, selector)
+
+def city_page_url(city: str, page_num: int) -> str:
+    """Build the listing URL for a city page (first page has no page parameter)"""
+    base_url = f"{BASE_URL}/{city}/pediatrician"
+    return base_url if page_num == 1 else f"{base_url}?page={page_num}"
+
+def collect_page_records(cards: list[dict], city: str, page_num: int, existing_data: set[int], data: list[Record]) -> int:
+    """Clean and deduplicate the raw cards of one page into data, returning the new record count"""
+    logger.info(f"Found {len(cards)} doctor cards on page {page_num}")
     
-    base_url = f"https://www.practo.com/{city}/pediatrician"
-    logger.info(f"Scraping: {base_url}")
+    # All cards on a page are collected together, so they share one timestamp
+    batch_ts = get_timestamp()
     
-    data = []
+    page_data_count = 0
+    for i, card in enumerate(cards):
+        try:
+            doctor_data = extract_doctor_data(card, city, batch_ts)
+            if doctor_data:
+                # Create unique identifier for deduplication
+                unique_id = record_key(doctor_data.clinic, doctor_data.location)
+                if unique_id not in existing_data:
+                    data.append(doctor_data)
+                    existing_data.add(unique_id)
+                    page_data_count += 1
+                    logger.info("✅ Scraped %d/%d: %s in %s", i + 1, len(cards), doctor_data.clinic, doctor_data.location)
+                else:
+                    logger.debug("Duplicate found, skipping: %s", doctor_data.clinic)
+            else:
+                logger.warning("❌ Failed to extract data from card %d", i + 1)
+            
+        except Exception as e:
+            logger.error("Error processing card %d: %s", i + 1, e)
     
-    for page_num in range(1, MAX_PAGES_PER_CITY + 1):
-        # Construct URL with page parameter
-        if page_num == 1:
-            url = base_url  # First page doesn't need page parameter
-        else:
-            url = f"{base_url}?page={page_num}"
+    logger.info(f"📄 Page {page_num} summary: {page_data_count} new records added")
+    return page_data_count
+
+def select_all(root, selector: str) -> list:
+    """Run a selector against a selectolax node, emulating :has-text() with a text match"""
+    match = HAS_TEXT_SELECTOR_RE.match(selector)
+    if not match:
+        return root.css(selector)
+    tag, needle = match.group(1), match.group(2).lower()
+    return [node for node in root.css(tag) if needle in node.text().lower()]
+
+def node_text(node) -> str:
+    """Visible text of a selectolax node, or an empty string"""
+    return node.text(separator=" ", strip=True) if node else ""
+
+def first_text(root, selectors: list[str]) -> str:
+    """Text of the first selector that yields a non-empty element"""
+    for selector in selectors:
+        matches = select_all(root, selector)
+        text = node_text(matches[0]) if matches else ""
+        if text:
+            return text
+    return ""
+
+def is_fallback_fee(text: str) -> bool:
+    """Whether a stray span/div text looks like a fee (mirrors isFallbackFee in EXTRACT_CARDS_JS)"""
+    lowered = text.lower()
+    return ((('₹' in text and len(text) <= 20) or
+             (('fee' in lowered or 'consultation' in lowered) and HAS_DIGIT_RE.search(text) is not None)) and
+            not any(exclude in lowered for exclude in FEE_EXCLUDES))
+
+def scan_fallbacks(card, want_fee: bool) -> dict:
+    """First fee-like text and years-of-experience number among a card's span/div nodes"""
+    fee_fallback = experience_fallback = ""
+    for node in card.css('span, div'):
+        text = node_text(node)
+        if want_fee and not fee_fallback and is_fallback_fee(text):
+            fee_fallback = text
+        if not experience_fallback:
+            years_match = YEARS_EXP_RE.search(text.lower())
+            if years_match:
+                experience_fallback = years_match.group(1)
+        if (fee_fallback or not want_fee) and experience_fallback:
+            break
+    return {"feeFallback": fee_fallback, "experienceFallback": experience_fallback}
+
+def parse_cards_html(html: str) -> list[dict]:
+    """Parse listing HTML into the same raw card fields EXTRACT_CARDS_JS returns"""
+    tree = HTMLParser(html)
+    
+    cards = []
+    for selector in SELECTORS['cards']:
+        cards = select_all(tree, selector)
+        if cards:
+            promote_selector('cards', selector)
+            break
+    
+    parsed = []
+    for card in cards:
+        fee_node = card.css_first('[data-qa-id="consultation_fee"]')
+        fee_candidates: list[str] = []
+        if not fee_node:
+            for selector in SELECTORS['fee']:
+                fee_candidates.extend(node_text(node) for node in select_all(card, selector))
         
-        logger.info(f"Scraping page {page_num} of {MAX_PAGES_PER_CITY} for {city}...")
-        logger.info(f"URL: {url}")
+        experience = []
+        for selector in SELECTORS['experience']:
+            matches = select_all(card, selector)
+            experience.append(node_text(matches[0]) if matches else "")
         
+        parsed.append({
+            "name": first_text(card, SELECTORS['name']),
+            "clinic": node_text(card.css_first('[data-qa-id="doctor_clinic_name"]')),
+            "locality": node_text(card.css_first('[data-qa-id="practice_locality"]')),
+            "city": node_text(card.css_first('[data-qa-id="practice_city"]')),
+            "fee": node_text(fee_node) if fee_node else None,
+            "feeCandidates": fee_candidates,
+            "experience": experience,
+            **scan_fallbacks(card, not fee_node),
+            "phone": first_text(card, SELECTORS['phone']),
+        })
+    return parsed
+
+def create_http_client():
+    """Create the shared HTTP/2 client used by the fast path"""
+    if HTTP_IMPERSONATE:
+        if CurlSession:
+            return create_curl_session()
+        logger.warning("HTTP_IMPERSONATE is set but curl_cffi is not installed, using httpx")
+    
+    headers = {
+        "User-Agent": random_user_agent() if USER_AGENT_ROTATION else "Mozilla/5.0",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-IN,en;q=0.9",
+    }
+    
+    proxy = None
+    proxy_config = get_proxy_config()
+    if proxy_config:
+        auth = (proxy_config["username"], proxy_config["password"] or "") if proxy_config["username"] else None
+        proxy = httpx.Proxy(proxy_config["server"], auth=auth)
+        logger.info(f"Using proxy for HTTP: {proxy_config['server']}")
+    
+    return httpx.AsyncClient(
+        http2=True,
+        headers=headers,
+        proxy=proxy,
+        follow_redirects=True,
+        timeout=httpx.Timeout(30.0),
+        # Every page of every city multiplexes over the same HTTP/2 connection, so keep
+        # it alive across the pauses between cities instead of re-handshaking
+        limits=httpx.Limits(max_connections=HTTP_CONCURRENCY, keepalive_expiry=60.0),
+    )
+
+def create_curl_session():
+    """Create a curl_cffi session that presents the TLS and HTTP/2 fingerprint of a real browser"""
+    # The impersonated browser brings its own matching User-Agent and header order
+    headers = {"Accept-Language": "en-IN,en;q=0.9"}
+    
+    proxies = None
+    proxy_config = get_proxy_config()
+    if proxy_config:
+        proxy_url = proxy_config["server"]
+        if proxy_config["username"]:
+            scheme, _, host = proxy_url.rpartition("://")
+            credentials = f"{quote(proxy_config['username'])}:{quote(proxy_config['password'] or '')}"
+            proxy_url = f"{scheme or 'http'}://{credentials}@{host}"
+        proxies = {"http": proxy_url, "https": proxy_url}
+        logger.info(f"Using proxy for HTTP: {proxy_config['server']}")
+    
+    logger.info(f"Fetching listings with curl_cffi impersonating {HTTP_IMPERSONATE}")
+    return CurlSession(
+        impersonate=HTTP_IMPERSONATE,
+        headers=headers,
+        proxies=proxies,
+        allow_redirects=True,
+        timeout=30,
+        max_clients=HTTP_CONCURRENCY,
+    )
+
+async def close_http_client(client):
+    """Close either kind of fast-path client"""
+    if isinstance(client, httpx.AsyncClient):
+        await client.aclose()
+    else:
+        await client.close()
+
+async def wait_for_rate_limit():
+    """Sleep out any rate-limit window the server has reported as exhausted"""
+    pause = rate_limit_until - time.monotonic()
+    if pause > 0:
+        logger.debug(f"Rate limit exhausted, pausing {pause:.1f}s")
+        await asyncio.sleep(pause)
+
+async def fetch_city_page(client, semaphore, city, page_num):
+    """Fetch one listing page over HTTP with retries, returning (status_code, cards)"""
+    global rate_limit_until
+    url = city_page_url(city, page_num)
+    if HTTP_CACHE_ENABLED:
+        cached = read_cache(HTTP_CACHE_DIR, url, HTTP_CACHE_TTL)
+        if cached is not None:
+            logger.debug("Cache hit: %s", url)
+            return 200, parse_cards_html(cached.decode("utf-8", errors="replace"))
+    
+    for attempt in range(MAX_RETRIES):
+        last_attempt = attempt == MAX_RETRIES - 1
         try:
-            # Navigate to the specific page
-            page.goto(url, timeout=60000)
-            
-            # Try multiple selectors for cards
-            cards_found = False
-            for selector in SELECTORS['cards']:
-                try:
-                    page.wait_for_selector(selector, timeout=15000)
-                    cards_found = True
-                    break
-                except PlaywrightTimeoutError:
-                    continue
+            async with semaphore:
+                await wait_for_rate_limit()
+                response = await client.get(url)
+        except HTTP_TRANSPORT_ERRORS as e:
+            if last_attempt:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Fetch failed for {city} page {page_num} ({str(e)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        
+        # Pace every concurrent fetch, not just this one, once the window runs out
+        pause = rate_limit_pause(response.headers)
+        if pause:
+            rate_limit_until = max(rate_limit_until, time.monotonic() + pause)
+        
+        if response.status_code in RETRY_STATUSES and not last_attempt:
+            delay = backoff_delay(attempt, response.headers.get("retry-after"))
+            logger.warning(f"HTTP {response.status_code} for {city} page {page_num}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        break
+    
+    if response.status_code != 200:
+        return response.status_code, []
+    
+    cards = parse_cards_html(response.text)
+    # Only pages with cards are cached, never challenge or empty pages
+    if HTTP_CACHE_ENABLED and cards:
+        write_cache(HTTP_CACHE_DIR, url, response.content)
+    return response.status_code, cards
+
+async def scrape_city_http(client, semaphore, city, existing_data, failed_pages):
+    """Scrape a city without a browser; returns None when the listing needs JavaScript"""
+    logger.info(f"Scraping over HTTP: {city_page_url(city, 1)}")
+    
+    # Page 1 decides whether the listing is server-rendered at all
+    try:
+        status, first_cards = await fetch_city_page(client, semaphore, city, 1)
+    except HTTP_ERRORS as e:
+        logger.warning(f"HTTP fetch failed for {city}, falling back to browser: {str(e)}")
+        return None
+    
+    if status in BLOCKED_STATUSES:
+        logger.info(f"HTTP {status} for {city}, falling back to browser")
+        return None
+    
+    if not first_cards:
+        # No server-rendered cards: the listing is likely rendered client-side
+        logger.info(f"No cards in HTML for {city}, falling back to browser")
+        return None
+    
+    # Pages are plain ?page=N URLs, so fetch the rest of the city concurrently
+    responses = await asyncio.gather(
+        *[fetch_city_page(client, semaphore, city, page_num) for page_num in range(2, MAX_PAGES_PER_CITY + 1)],
+        return_exceptions=True
+    )
+    
+    data = []
+    
+    for page_num, response in enumerate([None] + responses, 1):
+        if page_num == 1:
+            cards = first_cards
+        else:
+            if isinstance(response, BaseException):
+                logger.error(f"Failed to fetch page {page_num} for {city}: {str(response)}")
+                failed_pages.append((city, page_num))
+                continue
             
-            if not cards_found:
-                logger.warning(f"Could not find any doctor cards on page {page_num} for {city}")
-                # If no cards found on this page, try next page (might be empty pages)
+            status, cards = response
+            if status in RETRY_STATUSES:
+                logger.error(f"HTTP {status} on page {page_num} for {city} after {MAX_RETRIES} attempts")
+                failed_pages.append((city, page_num))
                 continue
-                
-        except PlaywrightTimeoutError as e:
-            logger.error(f"Timeout loading page {page_num} for {city}: {str(e)}")
+            if status in BLOCKED_STATUSES:
+                logger.warning(f"HTTP {status} on page {page_num} for {city}")
+                break
+            
+            if not cards:
+                logger.info(f"Reached end of results at page {page_num} for {city}")
+                break
+        
+        page_data_count = collect_page_records(cards, city, page_num, existing_data, data)
+        
+        # If no new data was found on this page, we might have reached the end
+        if page_data_count == 0 and STOP_ON_EMPTY_PAGE:
+            logger.info(f"No new data found on page {page_num}, stopping pagination for {city}")
+            break
+    
+    logger.info(f"🏁 Completed {city} over HTTP: {len(data)} unique records scraped")
+    return data
+
+async def reveal_missing_phones(page: Page, cards: list[dict]) -> None:
+    """Reveal hidden phone numbers one card at a time: click, read the contact modal, close it"""
+    clicked = revealed = 0
+    for index, card in enumerate(cards):
+        if card.get('phone'):
             continue
-        except Exception as e:
-            logger.error(f"Failed to load page {page_num} for {city}: {str(e)}")
+        if not await page.evaluate(CLICK_CONTACT_JS, [SELECTORS, index]):
             continue
+        clicked += 1
+        
+        try:
+            handle = await page.wait_for_function(REVEALED_PHONE_JS, arg=[SELECTORS, index], timeout=3000)
+            card['phone'] = await handle.json_value()
+            revealed += 1
+        except PlaywrightTimeoutError:
+            logger.debug("No phone number appeared for card %d", index + 1)
         
-        # Random delay between page requests
-        delay = random_delay(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX)
-        logger.debug(f"Random delay: {delay:.2f} seconds")
+        # The modal is shared, so it has to be gone before the next card is clicked
+        await page.keyboard.press("Escape")
+        try:
+            await page.wait_for_function(OVERLAY_CLOSED_JS, arg=SELECTORS, timeout=2000)
+        except PlaywrightTimeoutError:
+            logger.debug("Contact modal did not close, skipping the remaining phone reveals")
+            break
+    
+    if clicked:
+        logger.debug(f"Revealed {revealed}/{clicked} phone numbers")
+
+async def load_listing_page(page, url):
+    """Navigate to a listing page, retrying timeouts and rate limits with backoff.
+    
+    Returns True once cards are present, False if the page loaded without cards,
+    and None if it could not be loaded within MAX_RETRIES attempts.
+    """
+    for attempt in range(MAX_RETRIES):
+        last_attempt = attempt == MAX_RETRIES - 1
+        try:
+            # Navigate to the specific page; the card wait below covers the rest of the render
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+        except PlaywrightTimeoutError as e:
+            if last_attempt:
+                logger.error(f"Timeout loading {url} after {MAX_RETRIES} attempts: {str(e)}")
+                return None
+            delay = backoff_delay(attempt)
+            logger.warning(f"Timeout loading {url}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
         
+        if response and response.status in RETRY_STATUSES:
+            if last_attempt:
+                logger.error(f"HTTP {response.status} for {url} after {MAX_RETRIES} attempts")
+                return None
+            delay = backoff_delay(attempt, response.headers.get("retry-after"))
+            logger.warning(f"HTTP {response.status} for {url}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        break
+    
+    # Try multiple selectors for cards, iterating a snapshot since other cities reorder the list
+    for selector in list(SELECTORS['cards']):
         try:
-            # Find cards using flexible selectors
-            cards = None
-            for selector in SELECTORS['cards']:
-                cards = page.query_selector_all(selector)
-                if cards:
-                    break
+            await page.wait_for_selector(selector, timeout=15000)
+        except PlaywrightTimeoutError:
+            continue
+        promote_selector('cards', selector)
+        await cache_listing_response(url, response)
+        return True
+    return False
+
+async def cache_listing_response(url, response):
+    """Store a browser-loaded listing document once its cards have rendered"""
+    if not HTTP_CACHE_ENABLED or response is None or response.status != 200:
+        return
+    if CACHE_HIT_HEADER in response.headers:
+        return  # Served from the cache; rewriting it would keep extending its TTL
+    try:
+        write_cache(HTTP_CACHE_DIR, url, await response.body())
+    except Exception as e:
+        logger.debug(f"Could not cache {url}: {str(e)}")
+
+async def prefetch_listing_page(page, url):
+    """Wait out the anti-bot jitter, then load a listing page in the background"""
+    delay = await random_delay(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX)
+    logger.debug(f"Random delay: {delay:.2f} seconds")
+    return await load_listing_page(page, url)
+
+async def scrape_city(page: Page, city: str, existing_data: Optional[set[int]] = None,
+                      failed_pages: Optional[deque] = None) -> list[Record]:
+    """Scrape pediatricians for a single city with URL-based pagination.
+    
+    Pages are double-buffered: once page N has loaded and shown cards, page N+1 loads
+    in a second tab while page N is extracted. Only one navigation is ever in flight.
+    """
+    if existing_data is None:
+        existing_data = set()
+    if failed_pages is None:
+        failed_pages = deque()
+    
+    logger.info(f"Scraping: {city_page_url(city, 1)}")
+    
+    data: list[Record] = []
+    spare: Optional[Page] = None
+    pending: Optional[asyncio.Task] = None
+    
+    try:
+        for page_num in range(1, MAX_PAGES_PER_CITY + 1):
+            url = city_page_url(city, page_num)
             
-            if not cards:
-                logger.info(f"No cards found on page {page_num} for {city}")
-                # If no cards on this page, we might have reached the end
-                logger.info(f"Reached end of results at page {page_num} for {city}")
-                break
-                
-            logger.info(f"Found {len(cards)} doctor cards on page {page_num}")
+            logger.info(f"Scraping page {page_num} of {MAX_PAGES_PER_CITY} for {city}...")
+            logger.info(f"URL: {url}")
+            
+            # Load this page here unless it was prefetched while the previous one was extracted
+            if pending is None:
+                pending = asyncio.create_task(
+                    load_listing_page(page, url) if page_num == 1 else prefetch_listing_page(page, url)
+                )
+            load, pending = pending, None
+            prefetched = False
             
-            page_data_count = 0
-            for i, card in enumerate(cards):
+            try:
                 try:
-                    doctor_data = extract_doctor_data(card, city)
-                    if doctor_data:
-                        # Create unique identifier for deduplication
-                        unique_id = f"{doctor_data['clinic']}_{doctor_data['location']}"
-                        if unique_id not in existing_data:
-                            data.append(doctor_data)
-                            existing_data.add(unique_id)
-                            page_data_count += 1
-                            logger.info(f"✅ Scraped {i+1}/{len(cards)}: {doctor_data['clinic']} in {doctor_data['location']}")
-                        else:
-                            logger.debug(f"Duplicate found, skipping: {doctor_data['clinic']}")
-                    else:
-                        logger.warning(f"❌ Failed to extract data from card {i+1}")
+                    cards_found = await load
+                    if cards_found is None:
+                        # Keep going with the next page; this one is retried at the end of the run
+                        failed_pages.append((city, page_num))
+                        continue
                     
+                    if not cards_found:
+                        logger.warning(f"Could not find any doctor cards on page {page_num} for {city}")
+                        # If no cards found on this page, try next page (might be empty pages)
+                        continue
+                        
                 except Exception as e:
-                    logger.error(f"Error processing card {i+1}: {str(e)}")
-            
-            logger.info(f"📄 Page {page_num} summary: {page_data_count} new records added")
-            
-            # If no new data was found on this page, we might have reached the end
-            if page_data_count == 0 and STOP_ON_EMPTY_PAGE:
-                logger.info(f"No new data found on page {page_num}, stopping pagination for {city}")
-                break
+                    logger.error(f"Failed to load page {page_num} for {city}: {str(e)}")
+                    failed_pages.append((city, page_num))
+                    continue
                 
-        except Exception as e:
-            logger.error(f"Error on page {page_num}: {str(e)}")
-            if not handle_errors(page, e, city, url, logger):
-                continue  # Try next page instead of breaking
+                try:
+                    # Pull every card's fields in one page.evaluate instead of per-element round-trips
+                    cards = await page.evaluate(EXTRACT_CARDS_JS, SELECTORS)
+                    
+                    if not cards:
+                        logger.info(f"No cards found on page {page_num} for {city}")
+                        # If no cards on this page, we might have reached the end
+                        logger.info(f"Reached end of results at page {page_num} for {city}")
+                        break
+                    
+                    # This page has results, so start loading the next one in the other tab
+                    if page_num < MAX_PAGES_PER_CITY:
+                        if spare is None:
+                            spare = await new_scraping_page(page.context)
+                        pending = asyncio.create_task(prefetch_listing_page(spare, city_page_url(city, page_num + 1)))
+                        prefetched = True
+                    
+                    if EXTRACT_PHONE and REVEAL_PHONE:
+                        await reveal_missing_phones(page, cards)
+                        
+                    page_data_count = collect_page_records(cards, city, page_num, existing_data, data)
+                    
+                    # If no new data was found on this page, we might have reached the end
+                    if page_data_count == 0 and STOP_ON_EMPTY_PAGE:
+                        logger.info(f"No new data found on page {page_num}, stopping pagination for {city}")
+                        break
+                        
+                except Exception as e:
+                    logger.error(f"Error on page {page_num}: {str(e)}")
+                    if not await handle_errors(page, e, city, url, logger, SAVE_SCREENSHOTS, SCREENSHOT_FULL_PAGE,
+                                                 wait_selector=SELECTORS['cards'][0]):
+                        continue  # Try next page instead of breaking
+            finally:
+                # The tab that was prefetching becomes the current page
+                if prefetched and spare is not None:
+                    page, spare = spare, page
+    finally:
+        # Pagination stopped early: drop the page that was loading ahead
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        if spare is not None:
+            try:
+                await spare.close()
+            except Exception as e:
+                logger.debug(f"Closing prefetch tab failed for {city}: {str(e)}")
     
     logger.info(f"🏁 Completed {city}: {len(data)} unique records scraped across {min(page_num, MAX_PAGES_PER_CITY)} pages")
     return data
 
-def save_to_csv(data, filename):
-    """Save scraped data to CSV file with improved error handling"""
-    try:
+class CsvSink:
+    """Output CSV kept open for the whole run; headers are written only to a new file"""
+    
+    def __init__(self, filename, headers):
         # Ensure output directory exists
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         
         # Check if file exists to determine if we need headers
-        file_exists = os.path.exists(filename)
+        file_exists = os.path.exists(filename) and os.path.getsize(filename) > 0
         
-        with open(filename, "a" if file_exists else "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=HEADERS)
-            
-            # Write headers only if file is new
-            if not file_exists:
-                writer.writeheader()
-            
-            for row in data:
-                try:
-                    writer.writerow({
-                        "City": row["city"],
-                        "Clinic": row["clinic"],
-                        "Location": row["location"],
-                        "Fee": row["fee"],
-                        "Experience": row["experience"],
-                        "Phone": row["phone"],
-                        "Timestamp": row["timestamp"]
-                    })
-                except Exception as e:
-                    logger.error(f"Error writing row: {str(e)}")
-                    
-        logger.info(f"💾 Saved {len(data)} records to {filename}")
-        return True
+        # Rows are serialized in memory and written as one UTF-8 blob per batch
+        self.file = open(filename, "ab", buffering=CSV_BUFFER_SIZE)
         
-    except PermissionError as e:
-        logger.error(f"Permission denied writing to {filename}: {str(e)}")
-        return False
-    except Exception as e:
-        logger.error(f"Failed to save CSV: {str(e)}")
-        return False
+        # Write headers only if file is new
+        if not file_exists:
+            self.add_rows([headers])
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.file.close()
+    
+    def add_rows(self, rows: list[Record]) -> None:
+        """Append Records with a single write (fields are already in HEADERS order)"""
+        try:
+            buffer = io.StringIO(newline="")
+            csv.writer(buffer).writerows(rows)
+            self.file.write(buffer.getvalue().encode("utf-8"))
+        except (csv.Error, OSError) as e:
+            logger.error(f"Error writing rows: {str(e)}")
+    
+    def flush(self):
+        """Push buffered rows to disk"""
+        self.file.flush()
 
-def load_existing_data(filename):
+def load_existing_data(filename: str) -> set[int]:
     """Load existing data for deduplication"""
     existing_data = set()
     try:
@@ -497,84 +975,227 @@ def load_existing_data(filename):
             with open(filename, "r", encoding="utf-8") as f:
                 reader = csv.DictReader(f)
                 for row in reader:
-                    unique_id = f"{row.get('Clinic', '')}_{row.get('Location', '')}"
+                    unique_id = record_key(row.get('Clinic', ''), row.get('Location', ''))
                     existing_data.add(unique_id)
             logger.info(f"Loaded {len(existing_data)} existing records for deduplication")
     except Exception as e:
         logger.warning(f"Could not load existing data: {str(e)}")
     return existing_data
 
-def main():
+async def retry_failed_pages(failed_pages, client, http_semaphore, get_browser, existing_data, on_city_done):
+    """Give pages that exhausted their retries one last pass, over HTTP first and then in the browser"""
+    logger.info(f"🔁 Retrying {len(failed_pages)} failed pages")
+    
+    context = page = browser_city = None
+    try:
+        while failed_pages:
+            city, page_num = failed_pages.popleft()
+            data = []
+            done = False
+            
+            if client:
+                try:
+                    _, cards = await fetch_city_page(client, http_semaphore, city, page_num)
+                    if cards:
+                        collect_page_records(cards, city, page_num, existing_data, data)
+                        done = True
+                except HTTP_ERRORS as e:
+                    logger.debug(f"HTTP retry failed for {city} page {page_num}: {str(e)}")
+            
+            if not done:
+                try:
+                    if page is None:
+                        context = await new_scraping_context(await get_browser())
+                        page = await new_scraping_page(context)
+                    elif city != browser_city:
+                        # One context serves the whole retry pass, so drop the previous city's session
+                        await context.clear_cookies()
+                    browser_city = city
+                    if await load_listing_page(page, city_page_url(city, page_num)):
+                        cards = await page.evaluate(EXTRACT_CARDS_JS, SELECTORS)
+                        collect_page_records(cards, city, page_num, existing_data, data)
+                        done = True
+                except Exception as e:
+                    logger.debug(f"Browser retry failed for {city} page {page_num}: {str(e)}")
+            
+            if data:
+                on_city_done(city, data)
+            if not done:
+                logger.error(f"❌ Giving up on page {page_num} for {city}")
+    finally:
+        if context:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"Context close failed: {str(e)}")
+
+async def scrape_cities_async(cities, existing_data, on_city_done, endpoint=None):
+    """Scrape cities concurrently, handing each finished city's rows to on_city_done(city, rows)"""
+    successful_cities = 0
+    failed_cities = 0
+    
+    # (city, page_num) pairs that failed every retry, drained once all cities are done
+    failed_pages = deque()
+    
+    async def process_city(i, city, get_browser, client, http_semaphore, browser_semaphore):
+        nonlocal successful_cities, failed_cities
+        
+        logger.info(f"📍 Processing city {i}/{len(cities)}: {city.upper()}")
+        try:
+            # Fast path: plain HTTP, no browser involved
+            city_data = None
+            if client:
+                city_data = await scrape_city_http(client, http_semaphore, city, existing_data, failed_pages)
+            
+            # Browser fallback for JS-gated listings
+            if city_data is None:
+                async with browser_semaphore:
+                    # Fresh context per city so cookies, pop-ups and navigation state don't leak
+                    context = await new_scraping_context(await get_browser())
+                    try:
+                        page = await new_scraping_page(context)
+                        city_data = await scrape_city(page, city, existing_data, failed_pages)
+                    finally:
+                        try:
+                            await context.close()
+                        except Exception as e:
+                            logger.debug(f"Context close failed for {city}: {str(e)}")
+            
+            if city_data:
+                on_city_done(city, city_data)
+                successful_cities += 1
+                logger.info(f"✅ Finished {city} - {len(city_data)} new records")
+            else:
+                failed_cities += 1
+                logger.warning(f"⚠️  No data scraped for {city}")
+        except Exception as e:
+            failed_cities += 1
+            logger.error(f"❌ Failed to scrape {city}: {str(e)}")
+    
+    async with async_playwright() as playwright:
+        browser = None
+        browser_lock = asyncio.Lock()
+        
+        async def get_browser():
+            # Launch Chromium only once a city actually needs it
+            nonlocal browser
+            async with browser_lock:
+                if browser is None:
+                    browser = await init_browser(playwright, endpoint)
+            return browser
+        
+        client = create_http_client() if HTTP_FAST_PATH else None
+        try:
+            http_semaphore = asyncio.Semaphore(HTTP_CONCURRENCY)
+            browser_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+            
+            await asyncio.gather(*[
+                process_city(i, city, get_browser, client, http_semaphore, browser_semaphore)
+                for i, city in enumerate(cities, 1)
+            ])
+            
+            if failed_pages:
+                await retry_failed_pages(failed_pages, client, http_semaphore, get_browser, existing_data, on_city_done)
+        finally:
+            if client:
+                await close_http_client(client)
+            try:
+                if browser:
+                    await browser.close()
+            except:
+                pass
+    
+    return successful_cities, failed_cities
+
+def run_shard(cities_subset, existing_data, endpoint=None):
+    """Worker process entry point: scrape a shard of cities on its own event loop and browser"""
+    # A forked worker still holds the parent's log handlers; switch to this process's own file
+    setup_logger()
+    rows = []
+    try:
+        successful, failed = asyncio.run(
+            scrape_cities_async(cities_subset, existing_data, lambda city, city_data: rows.extend(city_data), endpoint)
+        )
+    finally:
+        # Pool workers exit through os._exit, which skips logging's flush at shutdown
+        for handler in logger.handlers:
+            handler.flush()
+    return rows, successful, failed
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Scrape pediatrician listings from Practo")
+    parser.add_argument(
+        "--endpoint",
+        default=BROWSER_ENDPOINT,
+        help="CDP endpoint of a running Chromium to attach to instead of launching one (e.g. http://127.0.0.1:9222)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main execution function with improved error handling and progress tracking"""
+    args = parse_args(argv)
     cities = load_cities()
     if not cities:
         logger.error("No cities to scrape. Exiting.")
         return
     
-    logger.info(f"🚀 Starting scraper for {len(cities)} cities")
+    workers = min(WORKER_PROCESSES, len(cities))
+    logger.info(f"🚀 Starting scraper for {len(cities)} cities ({workers} worker processes, {MAX_CONCURRENCY} browser contexts each, HTTP fast path {'on' if HTTP_FAST_PATH else 'off'})")
     logger.info(f"📁 Output directory: {OUTPUT_DIR}")
     logger.info(f"📄 Output file: {OUTPUT_FILE}")
     
     # Load existing data for deduplication
     existing_data = load_existing_data(OUTPUT_FILE)
     
-    all_data = []
-    successful_cities = 0
-    failed_cities = 0
+    try:
+        sink = CsvSink(OUTPUT_FILE, HEADERS)
+    except OSError as e:
+        logger.error(f"Cannot open {OUTPUT_FILE} for writing: {str(e)}")
+        return
     
-    with sync_playwright() as playwright:
-        try:
-            browser, context = init_browser(playwright)
-            page = context.new_page()
-            
-            for i, city in enumerate(cities, 1):
-                logger.info(f"📍 Processing city {i}/{len(cities)}: {city.upper()}")
-                
-                try:
-                    city_data = scrape_city(page, city, existing_data)
-                    if city_data:
-                        all_data.extend(city_data)
-                        successful_cities += 1
-                        logger.info(f"✅ Finished {city} - {len(city_data)} new records")
-                        
-                        # Save data incrementally to prevent loss
-                        if len(all_data) >= BATCH_SAVE_SIZE:  # Save every BATCH_SAVE_SIZE records
-                            save_to_csv(all_data, OUTPUT_FILE)
-                            all_data = []  # Clear to save memory
-                    else:
-                        failed_cities += 1
-                        logger.warning(f"⚠️  No data scraped for {city}")
-                    
-                    # Random delay between cities
-                    if i < len(cities):  # Don't delay after last city
-                        delay = random_delay(REQUEST_DELAY_MIN * 2, REQUEST_DELAY_MAX * 3)
-                        logger.debug(f"Delay before next city: {delay:.2f} seconds")
-                        
-                except KeyboardInterrupt:
-                    logger.info("⛔ Scraping interrupted by user")
-                    break
-                except Exception as e:
-                    failed_cities += 1
-                    logger.error(f"❌ Failed to scrape {city}: {str(e)}")
-                    continue
-        
-        except Exception as e:
-            logger.error(f"Browser initialization failed: {str(e)}")
-            return
-        finally:
-            try:
-                browser.close()
-            except:
-                pass
+    total_records = 0
     
-    # Save any remaining data
-    if all_data:
-        save_to_csv(all_data, OUTPUT_FILE)
+    def write_rows(rows):
+        nonlocal total_records
+        # Write as soon as rows arrive to keep memory flat and results durable
+        sink.add_rows(rows)
+        sink.flush()
+        total_records += len(rows)
+        logger.info(f"💾 Saved {len(rows)} records to {OUTPUT_FILE}")
+    
+    with sink:
+        if workers > 1:
+            successful_cities = failed_cities = 0
+            shards = [cities[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_shard, shard, existing_data, args.endpoint) for shard in shards]
+                for future in as_completed(futures):
+                    try:
+                        rows, successful, failed = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Worker process failed: {str(e)}")
+                        continue
+                    successful_cities += successful
+                    failed_cities += failed
+                    
+                    # Shards only dedupe against their own rows, so dedupe across shards here
+                    new_rows = []
+                    for row in rows:
+                        unique_id = record_key(row.clinic, row.location)
+                        if unique_id not in existing_data:
+                            existing_data.add(unique_id)
+                            new_rows.append(row)
+                    if new_rows:
+                        write_rows(new_rows)
+        else:
+            successful_cities, failed_cities = asyncio.run(
+                scrape_cities_async(cities, existing_data, lambda city, city_data: write_rows(city_data), args.endpoint)
+            )
     
     # Final summary
-    total_records = successful_cities  # Approximation since we don't count exact records here
     logger.info(f"🎉 Scraping completed!")
-    logger.info(f"📊 Summary: {successful_cities} successful cities, {failed_cities} failed cities")
+    logger.info(f"📊 Summary: {successful_cities} successful cities, {failed_cities} failed cities, {total_records} records")
     logger.info(f"📁 Output saved to: {OUTPUT_FILE}")
 
 if __name__ == "__main__":
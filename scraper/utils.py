@@ -1,17 +1,74 @@
+import asyncio
 import random
 import time
 import logging
 import re
+from logging.handlers import RotatingFileHandler
 import os
-from datetime import datetime
+import multiprocessing
+import hashlib
+import functools
+from collections import namedtuple
+from typing import Optional
 from fake_useragent import UserAgent
 
+# One cleaned output row, in CSV column order
+Record = namedtuple('Record', ['city', 'clinic', 'location', 'fee', 'experience', 'phone', 'timestamp'])
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that buffers records and writes each batch with one rollover check and one write"""
+    
+    def __init__(self, filename, capacity=1000, flushLevel=logging.WARNING, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.capacity = capacity
+        self.flushLevel = flushLevel
+        self.buffer = []
+    
+    def emit(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.capacity or record.levelno >= self.flushLevel:
+            self.flush()
+    
+    def flush(self):
+        self.acquire()
+        try:
+            if not self.buffer:
+                return
+            records, self.buffer = self.buffer, []
+            try:
+                text = "".join(self.format(record) + self.terminator for record in records)
+                if self.stream is None:  # delay was set
+                    self.stream = self._open()
+                if self.maxBytes > 0:
+                    self.stream.seek(0, 2)
+                    size = self.stream.tell()
+                    if size and size + len(text) >= self.maxBytes:
+                        self.doRollover()
+                        if self.stream is None:
+                            self.stream = self._open()
+                self.stream.write(text)
+                self.stream.flush()
+            except Exception:
+                self.handleError(records[-1])
+        finally:
+            self.release()
+    
+    def close(self):
+        # FileHandler.close skips flush while a delayed file is still unopened
+        self.flush()
+        super().close()
+
 def setup_logger():
     """Setup logger with both console and file handlers"""
     logger = logging.getLogger('practo_scraper')
     logger.setLevel(logging.INFO)
     
-    # Clear existing handlers to avoid duplicates
+    # Clear existing handlers to avoid duplicates. A forked worker inherits the parent's
+    # handlers and unwritten records, so those are dropped without being flushed
+    for handler in logger.handlers:
+        if isinstance(handler, BatchRotatingFileHandler):
+            handler.buffer.clear()
+        handler.close()
     logger.handlers.clear()
     
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -22,92 +79,157 @@ def setup_logger():
     ch.setFormatter(formatter)
     logger.addHandler(ch)
     
-    # File handler
+    # File handler: one file per day, opened on first write and rotated at 32 MiB.
+    # Rotation isn't safe across processes, so each worker process gets its own file
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_dir, f'scraper_log_{timestamp}.log')
+    today = time.strftime("%Y%m%d")
+    suffix = "" if multiprocessing.parent_process() is None else f"_{os.getpid()}"
+    log_file = os.path.join(log_dir, f'scraper_log_{today}{suffix}.log')
     
-    fh = logging.FileHandler(log_file, encoding='utf-8')
+    # Records are written in batches of 1000; warnings are written right away
+    fh = BatchRotatingFileHandler(log_file, capacity=1000, flushLevel=logging.WARNING,
+                                  maxBytes=32 << 20, backupCount=5, encoding='utf-8', delay=True)
     fh.setLevel(logging.DEBUG)
     fh.setFormatter(formatter)
     logger.addHandler(fh)
     
-    logger.info(f"📝 Log file created: {log_file}")
+    logger.info(f"📝 Logging to: {log_file}")
     return logger
 
-def random_delay(min_delay, max_delay):
-    """Generate and apply random delay between requests"""
-    delay = random.uniform(min_delay, max_delay)
-    time.sleep(delay)
+async def random_delay(min_delay, max_delay):
+    """Generate and apply random delay between requests without blocking the event loop"""
+    delay = min_delay + (max_delay - min_delay) * random.random()
+    # A zero delay config (e.g. when pacing is handled elsewhere) shouldn't cost an event loop hop
+    if delay > 0:
+        await asyncio.sleep(delay)
     return delay
 
-def random_user_agent():
-    """Generate random user agent string"""
+def backoff_delay(attempt, retry_after=None, cap=60):
+    """Seconds to wait before retrying: the server's Retry-After if given, else exponential backoff with jitter"""
+    if retry_after:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass  # HTTP-date form, fall back to backoff
+    return min(cap, 2 ** attempt + random.random())
+
+def rate_limit_pause(headers, cap=60):
+    """Seconds to hold off when the server reports an exhausted rate-limit window, else 0"""
+    if headers.get("x-ratelimit-remaining", "").strip() != "0":
+        return 0
     try:
-        ua = UserAgent()
-        return ua.random
+        reset = float(headers.get("x-ratelimit-reset", ""))
+    except ValueError:
+        return backoff_delay(0, cap=cap)
+    # Some servers send the reset as an epoch timestamp rather than seconds left
+    if reset > 1e9:
+        reset -= time.time()
+    return min(cap, max(0, reset))
+
+# Used when fake-useragent can't load its database
+_FALLBACK_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+@functools.lru_cache(maxsize=1)
+def _user_agent():
+    """Load the fake-useragent database once per process, or None if it can't be loaded"""
+    try:
+        return UserAgent()
     except Exception:
-        # Fallback user agents if fake-useragent fails
-        fallback_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        ]
-        return random.choice(fallback_agents)
+        return None
 
-def get_timestamp():
+def random_user_agent():
+    """Generate random user agent string"""
+    ua = _user_agent()
+    if ua is not None:
+        try:
+            return ua.random
+        except Exception:
+            pass
+    return random.choice(_FALLBACK_AGENTS)
+
+def get_timestamp() -> str:
     """Get current timestamp in standardized format"""
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+# Button and status labels that show up where a fee is expected
+_NON_FEE_VALUES = frozenset({
+    "available today", "on - call", "call", "book appointment",
+    "consult online", "video consult", "chat", "book", "available",
+    "call now", "contact", "enquire", "book now"
+})
 
-def clean_text(text):
+# Patterns used by the cleaners, compiled once at import
+_STRIP_SPECIAL_RE = re.compile(r'[^\w\s\-.,₹()]')
+_FEE_STRIP_RE = re.compile(r'consultation fee at clinic|consultation fee|at clinic', re.IGNORECASE)
+_FEE_RUPEE_RE = re.compile(r'₹\s*(\d+(?:,\d+)*)')
+_FEE_RS_RE = re.compile(r'rs\.?\s*(\d+(?:,\d+)*)', re.IGNORECASE)
+_FEE_NUM_RE = re.compile(r'\b(\d{2,5})\b')
+_HAS_DIGIT_RE = re.compile(r'\d')
+_NON_NUM_RE = re.compile(r'[^\d,.]')
+_EXP_RE = re.compile(r'(\d+)\s*(?:years?|yrs?)', re.IGNORECASE)
+_PHONE_RE = re.compile(r'(\+?91[-\s]?)?([6-9]\d{9})')
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+
+# The cleaners are pure and scraped values repeat a lot (cities, clinics, placeholder
+# fees), so each one memoizes its results
+@functools.lru_cache(maxsize=8192)
+def clean_text(text: str) -> str:
     """Clean and normalize text data"""
     if not text or text == "N/A":
         return "N/A"
     
     # Remove extra whitespace and normalize
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = ' '.join(text.split())
     
     # Remove trailing commas and clean punctuation
     text = text.rstrip(',').strip()
     
     # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s\-.,₹()]', '', text)
+    text = _STRIP_SPECIAL_RE.sub('', text)
     
     return text if text else "N/A"
 
-def clean_fee(fee_text):
+@functools.lru_cache(maxsize=8192)
+def clean_fee(fee_text: str) -> str:
     """Clean and standardize fee information - returns number only (INR assumed)"""
     if not fee_text or fee_text == "N/A":
         return "N/A"
     
-    # Handle common non-fee values
-    non_fee_values = [
-        "available today", "on - call", "call", "book appointment",
-        "consult online", "video consult", "chat", "book", "available",
-        "call now", "contact", "enquire", "book now"
-    ]
+    # Fast path: the fee element usually holds just the number
+    stripped = fee_text.strip()
+    if stripped.isascii() and stripped.isdigit() and len(stripped) <= 5 and 100 <= int(stripped) <= 50000:
+        return str(int(stripped))
     
-    if fee_text.lower().strip() in non_fee_values:
+    # Handle common non-fee values
+    key = stripped.lower()
+    if key in _NON_FEE_VALUES:
         return "N/A"
     
-    # Remove common text that's not part of the fee
-    fee_text = re.sub(r'consultation fee at clinic', '', fee_text, flags=re.IGNORECASE)
-    fee_text = re.sub(r'consultation fee', '', fee_text, flags=re.IGNORECASE)
-    fee_text = re.sub(r'at clinic', '', fee_text, flags=re.IGNORECASE)
+    # Remove common text that's not part of the fee, in one pass
+    # (surrounding whitespace never matters below, so reuse the stripped text)
+    fee_text = _FEE_STRIP_RE.sub('', stripped)
+    
+    # Nothing numeric to extract, so none of the patterns below can match
+    if not _HAS_DIGIT_RE.search(fee_text):
+        return "N/A"
     
     # Extract fee with currency symbol (return number only)
-    fee_match = re.search(r'₹\s*(\d+(?:,\d+)*)', fee_text)
+    fee_match = _FEE_RUPEE_RE.search(fee_text)
     if fee_match:
         return fee_match.group(1)  # Return number without ₹ symbol
     
     # Extract fee with Rs./rs (return number only)
-    rs_match = re.search(r'(?:rs\.?|RS\.?)\s*(\d+(?:,\d+)*)', fee_text, flags=re.IGNORECASE)
+    rs_match = _FEE_RS_RE.search(fee_text)
     if rs_match:
         return rs_match.group(1)  # Return number without Rs prefix
     
     # Extract standalone numbers that look like fees (reasonable range)
-    number_match = re.search(r'\b(\d{2,5})\b', fee_text)
+    number_match = _FEE_NUM_RE.search(fee_text)
     if number_match:
         number = int(number_match.group(1))
         # Reasonable fee range: 100 to 50000
@@ -115,38 +237,41 @@ def clean_fee(fee_text):
             return str(number)  # Return as string number
     
     # If it contains digits but doesn't match patterns, clean and return
-    if re.search(r'\d', fee_text):
-        cleaned = re.sub(r'[^\d,.]', '', fee_text)  # Remove everything except digits, commas, dots
+    if _HAS_DIGIT_RE.search(fee_text):
+        cleaned = _NON_NUM_RE.sub('', fee_text)  # Remove everything except digits, commas, dots
         if cleaned and cleaned.replace(',', '').replace('.', '').isdigit():
             return cleaned
     
-    return clean_text(fee_text)
+    # Text that doesn't parse as a fee isn't one
+    return "N/A"
 
-def clean_experience(exp_text):
+@functools.lru_cache(maxsize=8192)
+def clean_experience(exp_text: str) -> str:
     """Clean and standardize experience information"""
     if not exp_text or exp_text == "N/A":
         return "N/A"
     
     # Extract years of experience
-    exp_match = re.search(r'(\d+)\s*(?:years?|yrs?)', exp_text.lower())
+    exp_match = _EXP_RE.search(exp_text)
     if exp_match:
         years = exp_match.group(1)
         return f"{years} years"
     
     return clean_text(exp_text)
 
-def clean_phone(phone_text):
+@functools.lru_cache(maxsize=8192)
+def clean_phone(phone_text: str) -> str:
     """Clean and standardize phone number"""
     if not phone_text or phone_text == "N/A":
         return "N/A"
     
     # Extract phone number (Indian format)
-    phone_match = re.search(r'(\+?91[-\s]?)?([6-9]\d{9})', phone_text)
+    phone_match = _PHONE_RE.search(phone_text)
     if phone_match:
         return f"+91-{phone_match.group(2)}"
     
     # Extract 10-digit number
-    digits_only = re.sub(r'[^\d]', '', phone_text)
+    digits_only = _NON_DIGIT_RE.sub('', phone_text)
     if len(digits_only) == 10 and digits_only[0] in '6789':
         return f"+91-{digits_only}"
     elif len(digits_only) == 12 and digits_only.startswith('91'):
@@ -154,8 +279,8 @@ def clean_phone(phone_text):
     
     return clean_text(phone_text)
 
-def validate_and_clean_data(data):
-    """Validate and clean scraped data"""
+def validate_and_clean_data(data: dict) -> Optional[Record]:
+    """Validate and clean scraped data into a Record"""
     if not data or not isinstance(data, dict):
         return None
     
@@ -163,52 +288,80 @@ def validate_and_clean_data(data):
     if not data.get('clinic') or not data.get('city'):
         return None
     
-    # Clean all fields
-    cleaned_data = {
-        'city': clean_text(data.get('city', '')).lower(),
-        'clinic': clean_text(data.get('clinic', '')),
-        'location': clean_text(data.get('location', '')),
-        'fee': clean_fee(data.get('fee', '')),
-        'experience': clean_experience(data.get('experience', '')),
-        'phone': clean_phone(data.get('phone', '')),
-        'timestamp': data.get('timestamp', get_timestamp())
-    }
-    
     # Final validation - ensure we have meaningful data
-    if cleaned_data['clinic'] == "N/A" or len(cleaned_data['clinic']) < 2:
+    clinic = clean_text(data.get('clinic', ''))
+    if clinic == "N/A" or len(clinic) < 2:
         return None
     
-    return cleaned_data
+    # Clean all fields
+    return Record(
+        city=clean_text(data.get('city', '')).lower(),
+        clinic=clinic,
+        location=clean_text(data.get('location', '')),
+        fee=clean_fee(data.get('fee', '')),
+        experience=clean_experience(data.get('experience', '')),
+        phone=clean_phone(data.get('phone', '')),
+        timestamp=data.get('timestamp') or get_timestamp()
+    )
+
+def write_file(path, data):
+    """Write bytes to a file (run off the event loop for large payloads)"""
+    with open(path, "wb") as f:
+        f.write(data)
 
-def handle_errors(page, error, city, url, logger):
+# Minimum seconds between error screenshots, so a failure cascade doesn't flood the disk
+SCREENSHOT_INTERVAL = 10
+_last_screenshot = 0.0
+
+async def handle_errors(page, error, city, url, logger, screenshot=False, full_page=False, wait_selector=None):
     """Enhanced error handling with recovery attempts"""
+    global _last_screenshot
     logger.error(f"Error in {city} ({url}): {str(error)}")
     
-    # Create screenshots directory
-    screenshot_dir = "screenshots"
-    os.makedirs(screenshot_dir, exist_ok=True)
-    
-    # Capture screenshot for debugging
-    try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        screenshot_path = os.path.join(screenshot_dir, f"error_{city}_{timestamp}.png")
-        page.screenshot(path=screenshot_path, full_page=True)
-        logger.info(f"📸 Screenshot saved: {screenshot_path}")
-    except Exception as e:
-        logger.warning(f"Could not capture screenshot: {str(e)}")
+    # Capture screenshot for debugging, at most one per SCREENSHOT_INTERVAL
+    now = time.monotonic()
+    if screenshot and now - _last_screenshot >= SCREENSHOT_INTERVAL:
+        _last_screenshot = now
+        try:
+            screenshot_dir = "screenshots"
+            os.makedirs(screenshot_dir, exist_ok=True)
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            screenshot_path = os.path.join(screenshot_dir, f"error_{city}_{timestamp}.png")
+            png = await page.screenshot(full_page=full_page)
+            
+            # Write the file on a worker thread so recovery doesn't wait on the disk
+            def log_saved(future):
+                if future.exception():
+                    logger.warning(f"Could not save screenshot: {str(future.exception())}")
+                else:
+                    logger.info(f"📸 Screenshot saved: {screenshot_path}")
+            
+            asyncio.get_running_loop().run_in_executor(None, write_file, screenshot_path, png).add_done_callback(log_saved)
+        except Exception as e:
+            logger.warning(f"Could not capture screenshot: {str(e)}")
     
     # Try to recover by reloading
     recovery_attempts = 3
+    retry_after = None
     for attempt in range(recovery_attempts):
         try:
             logger.info(f"🔄 Recovery attempt {attempt + 1}/{recovery_attempts}")
             
-            # Wait a bit before retry
-            time.sleep(2 ** attempt)  # Exponential backoff
+            # Wait a bit before retry: the server's Retry-After if it sent one, else
+            # capped exponential backoff with jitter so workers don't retry in lockstep
+            if retry_after:
+                delay = backoff_delay(attempt, retry_after, cap=30)
+            else:
+                delay = min(30, 2 ** attempt * (0.5 + random.random()))
+            await asyncio.sleep(delay)
             
-            # Reload page
-            page.reload(timeout=30000)
-            page.wait_for_load_state("networkidle", timeout=15000)
+            # Reload page; the DOM is enough, waiting for "load" would wait on ads and trackers
+            response = await page.reload(wait_until="domcontentloaded", timeout=10000)
+            if response and response.status in (429, 503):
+                retry_after = response.headers.get("retry-after")
+                raise RuntimeError(f"HTTP {response.status} on reload")
+            if wait_selector:
+                await page.wait_for_selector(wait_selector, timeout=5000)
             
             logger.info("✅ Page recovered successfully")
             return True
@@ -219,68 +372,65 @@ def handle_errors(page, error, city, url, logger):
     logger.error("❌ All recovery attempts failed")
     return False
 
-def extract_phone_from_page(page, logger):
-    """Try to extract phone number by clicking contact buttons"""
+def record_key(clinic, location) -> int:
+    """Compact dedup key for a record: a 64-bit BLAKE2 digest of its clinic and location"""
+    unique_id = f"{clinic}_{location}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(unique_id, digest_size=8).digest(), "big")
+
+def cache_path(cache_dir, url):
+    """Location of the cached response body for a URL"""
+    return os.path.join(cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+def read_cache(cache_dir, url, ttl):
+    """Return the cached body for a URL as bytes, or None if missing or older than ttl seconds"""
+    path = cache_path(cache_dir, url)
     try:
-        # Multiple selectors for contact buttons
-        contact_selectors = [
-            'button:has-text("Contact Clinic")',
-            'button:has-text("Call")',
-            'a:has-text("Contact")',
-            '.contact-btn',
-            '[data-qa-id="contact"]'
-        ]
-        
-        for selector in contact_selectors:
-            try:
-                contact_btn = page.query_selector(selector)
-                if contact_btn and contact_btn.is_visible():
-                    contact_btn.click()
-                    
-                    # Wait for phone number to appear
-                    phone_selectors = ['.c-vn__number', '.phone-number', '[data-qa-id="phone"]']
-                    for phone_selector in phone_selectors:
-                        try:
-                            page.wait_for_selector(phone_selector, timeout=3000)
-                            phone_element = page.query_selector(phone_selector)
-                            if phone_element:
-                                phone = phone_element.inner_text().strip()
-                                
-                                # Close any overlays
-                                try:
-                                    page.keyboard.press("Escape")
-                                    page.wait_for_timeout(1000)
-                                except:
-                                    pass
-                                
-                                return clean_phone(phone)
-                        except:
-                            continue
-                    break
-            except Exception as e:
-                logger.debug(f"Contact button extraction failed with {selector}: {str(e)}")
-                continue
-                
-    except Exception as e:
-        logger.debug(f"Phone extraction failed: {str(e)}")
-    
-    return "N/A"
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def write_cache(cache_dir, url, body):
+    """Store a response body on disk, replacing any previous entry atomically"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(cache_dir, url)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+# Progress bars are sliced from these instead of built character by character
+_FULL_BAR = '█' * 128
+_EMPTY_BAR = '░' * 128
 
 def create_progress_bar(current, total, width=50):
     """Create a simple text-based progress bar"""
     percent = (current / total) * 100
     filled = int(width * current // total)
-    bar = '█' * filled + '░' * (width - filled)
+    if width <= len(_FULL_BAR):
+        bar = _FULL_BAR[:filled] + _EMPTY_BAR[:max(0, width - filled)]
+    else:
+        bar = '█' * filled + '░' * (width - filled)
     return f'|{bar}| {percent:.1f}% ({current}/{total})'
 
+@functools.lru_cache(maxsize=1)
+def _process(pid):
+    """psutil handle for a process, or None if psutil is not installed (keyed by pid so forked workers get their own)"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process(pid)
+
 def log_memory_usage():
     """Log current memory usage if psutil is available"""
     try:
-        import psutil
-        process = psutil.Process()
-        memory_mb = process.memory_info().rss / 1024 / 1024
+        process = _process(os.getpid())
+        if process is None:
+            return "Memory: N/A (psutil not installed)"
+        memory_mb = process.memory_info().rss / 1048576
         return f"Memory: {memory_mb:.1f}MB"
-    except ImportError:
-        return "Memory: N/A (psutil not installed)"
     except Exception:
-        return "Memory: N/A"
\ No newline at end of file
+        return "Memory: N/A"
@@ -0,0 +1,20 @@
+#!/usr/bin/env sh
+# Start a long-lived headless Chromium that scraper runs can attach to with
+#   python scraper/scraper.py --endpoint http://127.0.0.1:9222
+# Override CHROMIUM_BIN, CDP_PORT or PROFILE_DIR as needed.
+
+CHROMIUM_BIN="${CHROMIUM_BIN:-chromium}"
+CDP_PORT="${CDP_PORT:-9222}"
+PROFILE_DIR="${PROFILE_DIR:-./.chrome-profile}"
+
+exec "$CHROMIUM_BIN" \
+    --headless=new \
+    --remote-debugging-address=127.0.0.1 \
+    --remote-debugging-port="$CDP_PORT" \
+    --user-data-dir="$PROFILE_DIR" \
+    --disable-blink-features=AutomationControlled \
+    --no-sandbox \
+    --disable-dev-shm-usage \
+    --disable-background-timer-throttling \
+    --disable-backgrounding-occluded-windows \
+    --disable-renderer-backgrounding